@@ -42,8 +42,7 @@ def detect_bursts_amp(df_features, burst_fraction_threshold=1, min_n_cycles=3):
     check_param_range(burst_fraction_threshold, 'burst_fraction_threshold', (0, 1))
 
     # Determine cycles that are defined as bursting throughout the whole cycle
-    is_burst = [frac >= burst_fraction_threshold for frac in df_features['burst_fraction']]
-    is_burst = np.array(is_burst)
+    is_burst = df_features['burst_fraction'].to_numpy() >= burst_fraction_threshold
 
     df_features['is_burst'] = check_min_burst_cycles(is_burst, min_n_cycles=min_n_cycles)
 
@@ -1,6 +1,6 @@
 """Detect bursts: cycle consistency approach."""
 
-import pandas as pd
+import numpy as np
 
 from bycycle.utils.checks import check_param_range
 from bycycle.burst.utils import check_min_burst_cycles
@@ -8,8 +8,6 @@ from bycycle.burst.utils import check_min_burst_cycles
 ###################################################################################################
 ###################################################################################################
 
-pd.options.mode.chained_assignment = None
-
 def detect_bursts_cycles(df_features, amp_fraction_threshold=0., amp_consistency_threshold=.5,
                          period_consistency_threshold=.5, monotonicity_threshold=.8,
                          min_n_cycles=3):
@@ -82,15 +80,16 @@ def detect_bursts_cycles(df_features, amp_fraction_threshold=0., amp_consistency
     check_param_range(period_consistency_threshold, 'period_consistency_threshold', (0, 1))
     check_param_range(monotonicity_threshold, 'monotonicity_threshold', (0, 1))
 
-    # Compute if each period is part of an oscillation
-    amp_fraction = df_features['amp_fraction'] > amp_fraction_threshold
-    amp_consistency = df_features['amp_consistency'] > amp_consistency_threshold
-    period_consistency = df_features['period_consistency'] > period_consistency_threshold
-    monotonicity = df_features['monotonicity'] > monotonicity_threshold
+    # Collect the features used to determine if each period is part of an oscillation,
+    #   as one contiguous float array, without copying again after selecting the columns
+    features = df_features[['amp_fraction', 'amp_consistency', 'period_consistency',
+                            'monotonicity']].to_numpy(dtype=float, copy=False)
+
+    thresholds = np.array([amp_fraction_threshold, amp_consistency_threshold,
+                           period_consistency_threshold, monotonicity_threshold])
 
     # Set the burst status for each cycle as the answer across all criteria
-    is_burst = amp_fraction & amp_consistency & period_consistency & monotonicity
-    is_burst = is_burst.to_numpy()
+    is_burst = np.all(features > thresholds, axis=1)
 
     # Set the first and last cycles to not be part of a burst
     is_burst[0] = False
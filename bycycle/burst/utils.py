@@ -1,18 +1,23 @@
 """Utilities for burst detection."""
 
 from copy import deepcopy
+from functools import lru_cache
+from importlib import import_module
 import numpy as np
 from bycycle.utils.checks import check_param_range, check_param_options
 
 ####################################################################################################
 ####################################################################################################
 
+# Minimum number of cycles for which the compiled loop is used, if numba is installed
+NUMBA_MIN_N_CYCLES = 10000
+
 def check_min_burst_cycles(is_burst, min_n_cycles=3):
     """Enforce minimum number of consecutive cycles to be considered a burst.
 
     Parameters
     ----------
-    is_burst : 1d array
+    is_burst : 1d array or list of bool
         Boolean array indicating which cycles are bursting.
     min_n_cycles : int, optional, default: 3
         The minimum number of cycles of consecutive cycles required to be considered a burst.
@@ -20,7 +25,11 @@ def check_min_burst_cycles(is_burst, min_n_cycles=3):
     Returns
     -------
     is_burst : 1d array
-        Updated burst array.
+        Updated boolean burst array. The input is not modified.
+
+    Notes
+    -----
+    If ``numba`` is installed, a compiled loop is used for arrays with at least 10000 cycles.
 
     Examples
     --------
@@ -31,8 +40,8 @@ def check_min_burst_cycles(is_burst, min_n_cycles=3):
     array([False, False, False, False,  True,  True,  True,  True, False])
     """
 
-    if not isinstance(is_burst, np.ndarray):
-        raise ValueError("Argument 'is_burst' must be a numpy array!")
+    # Copy to a boolean array once, so that all updates are contiguous, in-place writes
+    is_burst = np.array(is_burst, dtype=bool)
 
     # handle special case where input array is empty
     if len(is_burst) == 0:
@@ -41,22 +50,116 @@ def check_min_burst_cycles(is_burst, min_n_cycles=3):
     # Ensure argument is within valid range
     check_param_range(min_n_cycles, 'min_n_cycles', (0, np.inf))
 
-    # extract transition indices
-    diff = np.diff(is_burst, prepend=0, append=0)
-    transitions = np.flatnonzero(diff)
-    ons, offs = transitions[0::2], transitions[1::2]
+    # all bursts are long enough, or there are no bursts to check
+    if min_n_cycles <= 1 or not np.any(is_burst):
+        return is_burst
+
+    if len(is_burst) >= NUMBA_MIN_N_CYCLES:
+
+        min_burst_cycles_nb = _compile_min_burst_cycles_loop()
+
+        if min_burst_cycles_nb is not None:
+            return min_burst_cycles_nb(is_burst, min_n_cycles)
+
+    # the running length of each burst peaks at its final cycle
+    run_lengths = _cumsum_with_reset(is_burst)
+    run_ends = np.flatnonzero(np.diff(is_burst.astype(int), append=0) == -1)
 
     # select only segments with long enough duration
-    durations = offs - ons
-    too_short = durations < min_n_cycles
+    durations = run_lengths[run_ends]
+    long_enough = durations >= min_n_cycles
 
-    # construct bool time series from transition indices
-    for silence_on, silence_off in zip(ons[too_short], offs[too_short]):
-        is_burst[silence_on:silence_off] = False
+    # bursting cycles are the concatenation of all runs, so broadcast each run's
+    #   decision across its duration and write back in a single vectorized pass
+    is_burst[is_burst] = np.repeat(long_enough, durations)
 
     return is_burst
 
 
+def _min_burst_cycles_loop(is_burst, min_n_cycles):
+    """Enforce minimum number of consecutive cycles with a single loop, compiled with numba.
+
+    Parameters
+    ----------
+    is_burst : 1d array
+        Boolean array indicating which cycles are bursting.
+    min_n_cycles : int
+        The minimum number of cycles of consecutive cycles required to be considered a burst.
+
+    Returns
+    -------
+    is_burst : 1d array
+        Updated burst array.
+    """
+
+    n_cycles = 0
+
+    for idx in range(len(is_burst)):
+
+        if is_burst[idx]:
+            n_cycles += 1
+            continue
+
+        # drop the burst that ended on the previous cycle, if too short
+        if n_cycles < min_n_cycles:
+            is_burst[idx - n_cycles:idx] = False
+
+        n_cycles = 0
+
+    # drop a burst that continues until the last cycle, if too short
+    if n_cycles < min_n_cycles:
+        is_burst[len(is_burst) - n_cycles:] = False
+
+    return is_burst
+
+
+@lru_cache(maxsize=None)
+def _compile_min_burst_cycles_loop():
+    """Compile the minimum burst cycles loop with numba, on first use.
+
+    Returns
+    -------
+    min_burst_cycles_nb : callable or None
+        Compiled loop, or None if numba is not installed.
+    """
+
+    try:
+        numba = import_module('numba')
+    except ImportError:
+        return None
+
+    return numba.njit(cache=True)(_min_burst_cycles_loop)
+
+
+def _cumsum_with_reset(arr):
+    """Cumulative sum of a binary array that resets to zero at each zero element.
+
+    Parameters
+    ----------
+    arr : 1d array
+        Boolean or binary array.
+
+    Returns
+    -------
+    run_lengths : 1d array
+        Length of the current run of non-zero elements, up to and including each index.
+
+    Examples
+    --------
+    Count the length of consecutive bursting cycles:
+
+    >>> _cumsum_with_reset(np.array([True, True, False, True, True, True]))
+    array([1, 2, 0, 1, 2, 3])
+    """
+
+    arr = np.asarray(arr).astype(int)
+
+    csum = np.cumsum(arr)
+    resets = np.maximum.accumulate(np.where(arr == 0, csum, 0))
+
+    return csum - resets
+
+
 def recompute_edges(df_features, threshold_kwargs, burst_method='cycles', burst_kwargs=None):
     """Recompute the is_burst column for cycles on the edges of bursts.
 
@@ -156,10 +259,10 @@ def recompute_edge(df_features, cyc_idx, direction):
     edge = df_features.iloc[edge_range].copy()
 
     # Update dataframe with recomputed consistency features
-    df_features['amp_consistency'][cyc_idx] = \
+    df_features.loc[cyc_idx, 'amp_consistency'] = \
         compute_amp_consistency(edge, direction=direction)[1]
 
-    df_features['period_consistency'][cyc_idx] = \
+    df_features.loc[cyc_idx, 'period_consistency'] = \
         compute_period_consistency(edge, direction=direction)[1]
 
     return df_features
@@ -1,22 +1,35 @@
 """Functions to compute features across 2 dimensional arrays of data."""
 
+import os
+import atexit
 import warnings
 from copy import deepcopy
 from functools import partial
+from itertools import chain
+from contextlib import contextmanager
 from multiprocessing import Pool, cpu_count
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
 from bycycle.features import compute_features
 from bycycle.burst import detect_bursts_cycles, detect_bursts_amp
-from bycycle.group.utils import progress_bar, check_kwargs_shape
+from bycycle.group.utils import progress_bar, check_kwargs_shape, _kwargs_shape
+from bycycle.utils.checks import check_param_options
 from bycycle.utils.dataframes import epoch_df
 
 ###################################################################################################
 ###################################################################################################
 
+# Kwargs shared across all signals, set once per worker process by _init_worker
+_WORKER_STATE = {}
+
+# Process pools kept alive across calls, keyed by n_jobs, when BYCYCLE_REUSE_POOL=1
+_POOL_CACHE = {}
+
 def compute_features_2d(sigs, fs, f_range, compute_features_kwargs=None, axis=0,
-                        return_samples=True, n_jobs=-1, progress=None):
+                        return_samples=True, n_jobs=-1, progress=None, chunksize=None,
+                        backend='process'):
     """Compute shape and burst features for a 2 dimensional array of signals.
 
     Parameters
@@ -43,6 +56,16 @@ def compute_features_2d(sigs, fs, f_range, compute_features_kwargs=None, axis=0,
         The number of jobs to compute features in parallel.
     progress : {None, 'tqdm', 'tqdm.notebook'}
         Specify whether to display a progress bar. Uses 'tqdm', if installed.
+    chunksize : int, optional, default: None
+        The number of signals sent to a job at once, only used when ``backend='process'``.
+        Defaults to about four chunks per job, which reduces inter-process overhead for many
+        short signals. Use ``chunksize=1`` when computing features for a small number of long
+        signals.
+    backend : {'process', 'thread'}, optional, default: 'process'
+        Whether to compute features in parallel using a pool of processes or threads. Threads
+        avoid copying signals and dataframes between processes, which may be faster for short
+        signals, but only run in parallel while the global interpreter lock is released by numpy
+        and scipy. Comparing both backends on the data of interest is recommended.
 
     Returns
     -------
@@ -62,6 +85,8 @@ def compute_features_2d(sigs, fs, f_range, compute_features_kwargs=None, axis=0,
       first axis of ``sigs`` is required to apply unique kwargs to each signal.
     - ``return_samples`` is controlled from the kwargs passed in this function. If
       ``return_samples`` is a key in ``compute_features_kwargs``, it's value will be ignored.
+    - Setting the ``BYCYCLE_REUSE_POOL=1`` environment variable keeps worker processes alive
+      between calls, avoiding the cost of starting processes when called repeatedly.
 
     Examples
     --------
@@ -94,43 +119,51 @@ def compute_features_2d(sigs, fs, f_range, compute_features_kwargs=None, axis=0,
 
     # Check compute_features_kwargs
     kwargs = deepcopy(compute_features_kwargs)
-    kwargs = np.array(kwargs) if isinstance(kwargs, list) else kwargs
 
     check_kwargs_shape(sigs, kwargs, axis)
 
     kwargs = {} if kwargs is None else kwargs
     kwargs = [kwargs] if isinstance(kwargs, dict) else list(kwargs)
 
-    # Drop return_samples argument, as it is set directly in the function call
-    for kwarg in kwargs:
-        kwarg.pop('return_samples', None)
+    check_param_options(backend, 'backend', ['process', 'thread'])
 
     n_jobs = cpu_count() if n_jobs == -1 else n_jobs
 
     if axis == 0:
-        # Compute each signal independently and in paralllel
-        with Pool(processes=n_jobs) as pool:
-
-            if len(kwargs) > 1:
-                # Map iterable sigs and kwargs together
-                mapping = pool.imap(partial(_proxy_2d, fs=fs, f_range=f_range,
-                                            return_samples=return_samples),
-                                    zip(sigs, kwargs))
-
-            else:
-                # Only map sigs, kwargs are the same for each mapping
-                mapping = pool.imap(partial(compute_features, fs=fs, f_range=f_range,
-                                            return_samples=return_samples,
-                                            **kwargs[0]),
-                                    sigs)
+        # Compute each signal independently and in paralllel, dispatching the longest
+        #   signals first, so shorter signals fill in idle workers at the end
+        order = sorted(range(len(sigs)), key=lambda idx: len(sigs[idx]), reverse=True)
 
-            dfs_features = list(progress_bar(mapping, progress, len(sigs)))
+        # Batch signals sent to each job to reduce pickling and dispatching overhead
+        chunksize = max(1, len(sigs) // (n_jobs * 4)) if chunksize is None else chunksize
+
+        # Compute in the current process, without starting a pool, when not parallelizing
+        backend = 'serial' if n_jobs == 1 or len(sigs) <= 1 else backend
+
+        if len(kwargs) > 1:
+            # Map iterable sigs and kwargs together
+            proxy = partial(_proxy_2d, fs=fs, f_range=f_range, return_samples=return_samples)
+            mapping = _submit_varying(sigs, order, kwargs, proxy, n_jobs, chunksize, backend)
+
+        else:
+            # Only map sigs, kwargs are the same for each mapping
+            #   Drop return_samples argument, as it is set directly in the function call
+            kwargs[0].pop('return_samples', None)
+            shared_kwargs = dict(fs=fs, f_range=f_range, return_samples=return_samples, **kwargs[0])
+            mapping = _submit_uniform(sigs, order, shared_kwargs, n_jobs, chunksize, backend)
+
+        # Results are tagged with the index of their signal, and may arrive in any order
+        dfs_features = [None] * len(sigs)
+
+        for idx, df_features in progress_bar(mapping, progress, len(sigs)):
+            dfs_features[idx] = df_features
 
     elif axis is None:
         # Compute features after flattening the 2d array (i.e. calculated across a 1d signal)
         sig_flat = sigs.flatten()
 
         center_extrema = kwargs[0].pop('center_extrema', 'peak')
+        kwargs[0].pop('return_samples', None)
 
         df_flat = compute_features(sig_flat, fs=fs, f_range=f_range, return_samples=True,
                                    center_extrema=center_extrema, **kwargs[0])
@@ -214,6 +247,8 @@ def compute_features_3d(sigs, fs, f_range, compute_features_kwargs=None, axis=0,
       dimensions of ``sigs`` may also be used to applied unique parameters to each signal.
     - ``return_samples`` is controlled from the kwargs passed in this function. The
       ``return_samples`` value in ``compute_features_kwargs`` will be ignored.
+    - Setting the ``BYCYCLE_REUSE_POOL=1`` environment variable keeps worker processes alive
+      between calls, avoiding the cost of starting processes when called repeatedly.
 
     Examples
     --------
@@ -247,19 +282,26 @@ def compute_features_3d(sigs, fs, f_range, compute_features_kwargs=None, axis=0,
 
     n_jobs = cpu_count() if n_jobs == -1 else n_jobs
 
-    # Convert list of kwargs to array to check dimensions
+    n_groups, n_sigs, n_pts = sigs.shape
+
+    # Check compute_features_kwargs
     kwargs = deepcopy(compute_features_kwargs)
-    kwargs = np.array(kwargs) if isinstance(kwargs, list) else kwargs
+    kwargs = kwargs.tolist() if isinstance(kwargs, np.ndarray) else kwargs
 
     check_kwargs_shape(sigs, kwargs, axis)
-    kwargs = list(kwargs.flatten()) if isinstance(kwargs, np.ndarray) else [kwargs]
+
+    # Flatten kwargs into a 1d list
+    if not isinstance(kwargs, list):
+        kwargs = [kwargs]
+    elif _kwargs_shape(kwargs)[0] == 2:
+        kwargs = list(chain.from_iterable(kwargs))
 
     if axis in [0, 1]:
         # Independently across 2d slices along either the zeroth or first axis
         sigs = np.swapaxes(sigs, 0, 1) if axis == 1 else sigs
-        kwargs = kwargs * np.shape(sigs)[0] if len(kwargs) == 1 else kwargs
+        kwargs = kwargs * len(sigs) if len(kwargs) == 1 else kwargs
 
-        with Pool(processes=n_jobs) as pool:
+        with _process_pool(n_jobs) as (pool, _):
 
             mapping = pool.imap(partial(_proxy_3d, fs=fs, f_range=f_range,
                                         return_samples=return_samples),
@@ -272,7 +314,8 @@ def compute_features_3d(sigs, fs, f_range, compute_features_kwargs=None, axis=0,
 
     elif axis == (0, 1):
         # Independently across the first two axes (i.e. for each signal)
-        sigs_2d = sigs.reshape(np.shape(sigs)[0]*np.shape(sigs)[1], np.shape(sigs)[2])
+        #   Copy non-contiguous arrays once here, rather than within each worker
+        sigs_2d = np.ascontiguousarray(sigs).reshape(n_groups * n_sigs, n_pts)
         kwargs = kwargs[0] if len(kwargs) == 1 else kwargs
 
         df_2d = compute_features_2d(sigs_2d, fs, f_range, compute_features_kwargs=kwargs,
@@ -285,23 +328,131 @@ def compute_features_3d(sigs, fs, f_range, compute_features_kwargs=None, axis=0,
 
     if axis == (0, 1):
 
-        dfs_features = np.zeros((np.shape(sigs)[0], np.shape(sigs)[1])).tolist()
-
-        # Reshape
-        for dim0_idx in range(np.shape(sigs)[0]):
-            for dim1_idx in range(np.shape(sigs)[1]):
-                dfs_features[dim0_idx][dim1_idx] = df_2d[dim0_idx + dim1_idx]
+        # Reshape to (n_groups, n_sigs)
+        dfs_features = [df_2d[idx:idx + n_sigs] for idx in range(0, len(df_2d), n_sigs)]
 
     return dfs_features
 
 
+def _submit_uniform(sigs, order, shared_kwargs, n_jobs, chunksize, backend):
+    """Compute features of sigs sharing the same kwargs, yielding (index, features) pairs."""
+
+    if backend in ['serial', 'thread']:
+        # Memory is shared, so compute_features is mapped directly without a proxy
+        func = partial(compute_features, **shared_kwargs)
+        sigs_ordered = [sigs[idx] for idx in order]
+
+        if backend == 'serial':
+            yield from zip(order, map(func, sigs_ordered))
+
+        else:
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                yield from zip(order, executor.map(func, sigs_ordered))
+
+    else:
+        # Send kwargs to each worker process once, rather than with each signal
+        with _process_pool(n_jobs, initializer=_init_worker,
+                           initargs=(shared_kwargs,)) as (pool, initialized):
+
+            # Cached pools are shared across calls, so kwargs are sent with each chunk instead
+            proxy = _proxy_2d_shared if initialized else partial(_proxy_2d_shared, **shared_kwargs)
+
+            yield from pool.imap_unordered(proxy, [(idx, sigs[idx]) for idx in order],
+                                           chunksize=chunksize)
+
+
+def _submit_varying(sigs, order, kwargs_list, proxy, n_jobs, chunksize, backend):
+    """Compute features of sigs with unique kwargs, yielding (index, features) pairs."""
+
+    tasks = [(idx, sigs[idx], kwargs_list[idx]) for idx in order]
+
+    if backend == 'serial':
+        yield from map(proxy, tasks)
+
+    elif backend == 'thread':
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            yield from executor.map(proxy, tasks)
+
+    else:
+        with _process_pool(n_jobs) as (pool, _):
+            yield from pool.imap_unordered(proxy, tasks, chunksize=chunksize)
+
+
+@contextmanager
+def _process_pool(n_jobs, initializer=None, initargs=()):
+    """Context manager for a process pool, reusing a cached pool when BYCYCLE_REUSE_POOL=1.
+
+    Yields the pool, and whether the initializer was applied to its workers. Cached pools
+    are shared across calls, so the initializer is not applied to them.
+    """
+
+    if os.environ.get('BYCYCLE_REUSE_POOL', '0') == '1':
+
+        # Cached pools are left open, to be used by later calls
+        if n_jobs not in _POOL_CACHE:
+            _POOL_CACHE[n_jobs] = Pool(processes=n_jobs)
+
+        pool = _POOL_CACHE[n_jobs]
+
+        try:
+            yield pool, False
+
+        except BaseException:
+            # Stop any remaining tasks from this call, so they don't occupy later calls
+            pool.terminate()
+
+            if _POOL_CACHE.get(n_jobs) is pool:
+                del _POOL_CACHE[n_jobs]
+
+            raise
+
+    else:
+
+        with Pool(processes=n_jobs, initializer=initializer, initargs=initargs) as pool:
+            yield pool, True
+
+
+@atexit.register
+def _close_pools():
+    """Close all cached process pools."""
+
+    for pool in _POOL_CACHE.values():
+        pool.close()
+        pool.join()
+
+    _POOL_CACHE.clear()
+
+
 def _proxy_2d(args, fs=None, f_range=None, return_samples=None):
-    """Proxy function to map kwargs and 2d sigs together."""
+    """Proxy function to map kwargs and 2d sigs together, returning the signal's index."""
+
+    idx, sig, kwargs = args
+
+    # Copy kwargs for each signal, since compute_features may update nested kwargs, which
+    #   may be shared across signals, in the same list, or in the same chunk sent to a worker
+    kwargs = deepcopy(kwargs)
+
+    # Drop return_samples argument, as it is set directly in the function call
+    kwargs.pop('return_samples', None)
+
+    return idx, compute_features(sig, fs=fs, f_range=f_range,
+                                 return_samples=return_samples, **kwargs)
+
+
+def _proxy_2d_shared(args, **kwargs):
+    """Proxy function to map 2d sigs using kwargs, or those stored in the worker process."""
+
+    idx, sig = args
+
+    return idx, compute_features(sig, **(kwargs if kwargs else _WORKER_STATE))
+
+
+def _init_worker(kwargs):
+    """Store kwargs shared across all signals in the worker process."""
 
-    sig, kwargs = args[0], args[1:]
+    _WORKER_STATE.clear()
+    _WORKER_STATE.update(kwargs)
 
-    return compute_features(sig, fs=fs, f_range=f_range,
-                            return_samples=return_samples, **kwargs[0])
 
 def _proxy_3d(args, fs=None, f_range=None, return_samples=None):
     """Proxy function to map kwargs and 3d sigs together."""
@@ -108,9 +108,10 @@ def check_kwargs_shape(sigs, compute_features_kwargs, axis):
         return
 
     # Ensure kwargs match to sigs
-    kwargs_dim0 = np.shape(kwargs)[0]
-    kwargs_dim1 = np.shape(kwargs)[1] if kwargs.ndim == 2 else None
-    if kwargs.ndim == 3:
+    kwargs_ndim, kwargs_shape_in = _kwargs_shape(kwargs)
+    kwargs_dim0 = kwargs_shape_in[0]
+    kwargs_dim1 = kwargs_shape_in[1] if kwargs_ndim == 2 else None
+    if kwargs_ndim > 2:
         raise ValueError("compute_features_kwargs must be 1D or 2D.")
 
     # Sig checks
@@ -143,6 +144,41 @@ def check_kwargs_shape(sigs, compute_features_kwargs, axis):
     When sigs is {sigs_str}D and axis is {axis_str}, compute_features_kwargs must be {kwargs_dim}D
     with a shape equal to {kwargs_shape}.
     """.format(sigs_str=str(sigs.ndim), axis_str=str(axis),
-               kwargs_dim=str(kwargs.ndim), kwargs_shape=str(kwargs_shape))
+               kwargs_dim=str(kwargs_ndim), kwargs_shape=str(kwargs_shape))
 
     raise ValueError(error_str)
+
+
+def _kwargs_shape(kwargs):
+    """Get the dimensions of a nested list of kwargs, without converting it to an array.
+
+    Parameters
+    ----------
+    kwargs : list of dict or 2d list of dict
+        Keyword arguments used in :func:`~.compute_features`.
+
+    Returns
+    -------
+    ndim : int
+        Number of dimensions.
+    shape : tuple of int
+        Length of each dimension.
+
+    Raises
+    ------
+    ValueError
+        If the nested lists of kwargs differ in length.
+    """
+
+    if not isinstance(kwargs, (list, tuple, np.ndarray)):
+        return 0, ()
+
+    # Every row must share the same shape
+    row_shapes = {_kwargs_shape(row) for row in kwargs}
+
+    if len(row_shapes) > 1:
+        raise ValueError("compute_features_kwargs must not contain lists of unequal lengths.")
+
+    row_ndim, row_shape = row_shapes.pop() if row_shapes else (0, ())
+
+    return row_ndim + 1, (len(kwargs),) + row_shape
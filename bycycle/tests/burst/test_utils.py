@@ -6,12 +6,13 @@ import pytest
 
 from bycycle.features import compute_features
 from bycycle.burst.utils import *
+from bycycle.burst.utils import _cumsum_with_reset, _min_burst_cycles_loop
 
 
 ###################################################################################################
 ###################################################################################################
 
-@pytest.mark.parametrize("min_n_cycles", [2, 3])
+@pytest.mark.parametrize("min_n_cycles", [1, 2, 3])
 def test_check_min_burst_cycles(min_n_cycles):
 
     is_burst = np.array([False, True, True, False, False])
@@ -46,6 +47,17 @@ def test_check_min_burst_cycles_no_bursts():
     assert not any(is_burst_check)
 
 
+def test_check_min_burst_cycles_list_input():
+
+    is_burst = [False, True, True, False, True, True, True]
+
+    is_burst_check = check_min_burst_cycles(is_burst, min_n_cycles=3)
+
+    assert isinstance(is_burst_check, np.ndarray)
+    assert is_burst_check.dtype == bool
+    assert (is_burst_check == np.array([False, False, False, False, True, True, True])).all()
+
+
 def test_check_min_burst_cycles_empty_input():
 
     is_burst = np.array([])
@@ -54,6 +66,28 @@ def test_check_min_burst_cycles_empty_input():
     assert not len(is_burst_check)
 
 
+@pytest.mark.parametrize("n_cycles", [100, NUMBA_MIN_N_CYCLES])
+@pytest.mark.parametrize("min_n_cycles", [2, 3, 5])
+def test_min_burst_cycles_loop(n_cycles, min_n_cycles):
+
+    is_burst = np.random.default_rng(0).random(n_cycles) > .3
+
+    # The compiled loop is used for long arrays, if numba is installed
+    is_burst_check = check_min_burst_cycles(is_burst.copy(), min_n_cycles=min_n_cycles)
+    is_burst_loop = _min_burst_cycles_loop(is_burst.copy(), min_n_cycles)
+
+    assert (is_burst_check == is_burst_loop).all()
+
+
+def test_cumsum_with_reset():
+
+    is_burst = np.array([True, True, False, False, True, True, True, False, True])
+
+    run_lengths = _cumsum_with_reset(is_burst)
+
+    assert (run_lengths == np.array([1, 2, 0, 0, 1, 2, 3, 0, 1])).all()
+
+
 def test_recompute_edges(sim_args_comb):
 
     # Grab sim arguments from fixture
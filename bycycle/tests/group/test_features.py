@@ -1,11 +1,14 @@
 """Test functions to compute features across epoched data."""
 
+from copy import deepcopy
 from itertools import product
 import numpy as np
 import pandas as pd
 
 import pytest
+from bycycle.features import compute_features
 from bycycle.group.features import compute_features_2d, compute_features_3d
+from bycycle.group.features import _POOL_CACHE, _close_pools
 
 ###################################################################################################
 ###################################################################################################
@@ -50,9 +53,14 @@ def test_compute_features_2d(sim_args, kwargs_dtype, axis):
         features_par = compute_features_2d(sigs, fs, f_range, n_jobs=-1, return_samples=True,
                                            compute_features_kwargs=compute_features_kwargs)
 
+        features_thread = compute_features_2d(sigs, fs, f_range, n_jobs=-1, return_samples=True,
+                                              compute_features_kwargs=compute_features_kwargs,
+                                              backend='thread')
+
         # Compare sequential and parallel processing dfs
-        for idx, df_par in enumerate(features_par):
+        for idx, (df_par, df_thread) in enumerate(zip(features_par, features_thread)):
             assert df_par.equals(features_seq[idx])
+            assert df_thread.equals(features_seq[idx])
 
     if axis == None:
 
@@ -67,6 +75,38 @@ def test_compute_features_2d(sim_args, kwargs_dtype, axis):
         assert not features_seq[-1].equals(features_seq[1])
 
 
+def test_compute_features_2d_reuse_pool(sim_args, monkeypatch):
+
+    sigs = np.array([sim_args['sig']] * 4)
+    fs = sim_args['fs']
+    f_range = sim_args['f_range']
+
+    features = compute_features_2d(sigs, fs, f_range, n_jobs=2)
+
+    monkeypatch.setenv('BYCYCLE_REUSE_POOL', '1')
+
+    # The same pool is used for each call
+    features_reuse = compute_features_2d(sigs, fs, f_range, n_jobs=2)
+    pool = _POOL_CACHE[2]
+
+    features_reuse_next = compute_features_2d(sigs, fs, f_range, n_jobs=2)
+    assert _POOL_CACHE[2] is pool
+
+    for df_features, df_reuse, df_reuse_next in zip(features, features_reuse, features_reuse_next):
+        assert df_features.equals(df_reuse)
+        assert df_features.equals(df_reuse_next)
+
+    # Cached pools are terminated and removed after an error
+    with pytest.raises(ValueError):
+        compute_features_2d(sigs, fs, f_range, n_jobs=2,
+                            compute_features_kwargs={'center_extrema': 'invalid'})
+
+    assert 2 not in _POOL_CACHE
+
+    _close_pools()
+    assert not _POOL_CACHE
+
+
 @pytest.mark.parametrize("return_samples", [True, False])
 @pytest.mark.parametrize("axis", [0, 1, (0, 1), pytest.param(3, marks=pytest.mark.xfail)])
 def test_compute_features_3d(sim_args, return_samples, axis):
@@ -107,3 +147,88 @@ def test_compute_features_3d(sim_args, return_samples, axis):
             for col_idx in range(dim2):
                 if row_idx != 0 and col_idx != 0:
                     assert df_features[0][0].equals(df_features[row_idx][col_idx])
+
+
+@pytest.mark.parametrize("n_jobs, backend", [(1, 'process'), (2, 'process'), (2, 'thread')])
+@pytest.mark.parametrize("kwargs_dtype", ['dict', 'list'])
+def test_compute_features_2d_order(sim_args, n_jobs, backend, kwargs_dtype):
+
+    n_sigs = 4
+    sig = sim_args['sig']
+    fs = sim_args['fs']
+    f_range = sim_args['f_range']
+
+    # Scale each signal uniquely, so that features differ across signals
+    sigs = np.array([sig * (1 + idx) for idx in range(n_sigs)])
+
+    if kwargs_dtype == 'dict':
+        # Increasing signal lengths, so the longest signals are dispatched first
+        sigs = [sig[:int(len(sig) * (idx + 2) / (n_sigs + 1))] for idx, sig in enumerate(sigs)]
+        compute_features_kwargs = {'center_extrema': 'peak'}
+    else:
+        compute_features_kwargs = [{'center_extrema': center_extrema} for center_extrema
+                                   in ['peak', 'trough'] * (n_sigs // 2)]
+
+    dfs_features = compute_features_2d(sigs, fs, f_range, n_jobs=n_jobs, backend=backend,
+                                       compute_features_kwargs=compute_features_kwargs)
+
+    for idx in range(n_sigs):
+
+        kwargs = compute_features_kwargs if kwargs_dtype == 'dict' else \
+            compute_features_kwargs[idx]
+
+        df_features = compute_features(sigs[idx], fs, f_range, **kwargs)
+
+        assert df_features.equals(dfs_features[idx])
+
+
+# More than four signals per job, so chunks of several signals are sent to each worker
+@pytest.mark.parametrize("n_sigs", [2, 16])
+@pytest.mark.parametrize("n_jobs, backend", [(1, 'process'), (2, 'process'), (2, 'thread')])
+def test_compute_features_2d_shared_nested_kwargs(sim_args, n_sigs, n_jobs, backend):
+
+    sigs = np.array([sim_args['sig']] * n_sigs)
+    fs = sim_args['fs']
+    f_range = sim_args['f_range']
+
+    # Nested kwargs shared across signals, which compute_features updates on the amp path
+    burst_kwargs = {'amp_threshes': (.5, 1)}
+
+    compute_features_kwargs = [{'burst_method': 'amp', 'burst_kwargs': burst_kwargs,
+                                'threshold_kwargs': {'burst_fraction_threshold': 1,
+                                                     'min_n_cycles': min_n_cycles}}
+                               for min_n_cycles in [2, 200] * (n_sigs // 2)]
+
+    # Expected features, computed with independent kwargs for each signal
+    dfs_expected = [compute_features(sig, fs, f_range, **deepcopy(kwargs))
+                    for sig, kwargs in zip(sigs, compute_features_kwargs)]
+
+    dfs_features = compute_features_2d(sigs, fs, f_range, n_jobs=n_jobs, backend=backend,
+                                       compute_features_kwargs=compute_features_kwargs)
+
+    for df_expected, df_features in zip(dfs_expected, dfs_features):
+        assert df_expected.equals(df_features)
+
+    # Thresholds differ across signals, so burst detection must differ too
+    assert not dfs_features[0]['is_burst'].equals(dfs_features[1]['is_burst'])
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_compute_features_3d_order(sim_args, n_jobs):
+
+    fs = sim_args['fs']
+    f_range = sim_args['f_range']
+
+    # Scale each signal uniquely, so that features differ across signals
+    sigs_3d = np.array([[sim_args['sig'] * (1 + row_idx + col_idx * 3) for col_idx in range(2)]
+                        for row_idx in range(3)])
+
+    dfs_features = compute_features_3d(sigs_3d, fs, f_range, n_jobs=n_jobs, axis=(0, 1),
+                                       compute_features_kwargs={'center_extrema': 'peak'})
+
+    for row_idx, col_idx in product(range(3), range(2)):
+
+        df_features = compute_features(sigs_3d[row_idx][col_idx], fs, f_range,
+                                       center_extrema='peak')
+
+        assert df_features.equals(dfs_features[row_idx][col_idx])
@@ -4,7 +4,7 @@ import pytest
 
 import numpy as np
 
-from bycycle.group.utils import progress_bar, check_kwargs_shape
+from bycycle.group.utils import progress_bar, check_kwargs_shape, _kwargs_shape
 
 ###################################################################################################
 ###################################################################################################
@@ -64,3 +64,26 @@ def test_check_kwargs_shape(sim_args, axis, sigs_ndim, mismatch):
         assert False
     except ValueError:
         assert True
+
+
+@pytest.mark.parametrize("as_array", [True, False])
+def test_kwargs_shape(as_array):
+
+    kwargs_1d = [{'center_extrema': 'peak'}] * 3
+    kwargs_2d = [kwargs_1d] * 2
+    kwargs_3d = [kwargs_2d] * 4
+
+    for kwargs, shape in zip([kwargs_1d, kwargs_2d, kwargs_3d], [(3,), (2, 3), (4, 2, 3)]):
+
+        kwargs = np.array(kwargs) if as_array else kwargs
+
+        assert _kwargs_shape(kwargs) == (len(shape), shape)
+
+    assert _kwargs_shape({}) == (0, ())
+
+    # Ragged kwargs
+    with pytest.raises(ValueError):
+        _kwargs_shape([[{}] * 3, [{}] * 2])
+
+    with pytest.raises(ValueError):
+        _kwargs_shape([{}, [{}]])
@@ -281,8 +281,7 @@ def epoch_df(df_features, sig_len, epoch_len):
         idx_range = np.where((df_features[last_sample].values <= last_idx) & \
                                 (df_features[last_sample].values > first_idx))[0]
 
-        df_single = df_features.iloc[idx_range]
-        df_single.reset_index(drop=True, inplace=True)
+        df_single = df_features.iloc[idx_range].reset_index(drop=True)
 
         # Shift sample indices
         sample_cols = [col for col in df_single.columns if 'sample_' in col]